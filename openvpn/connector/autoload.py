@@ -9,6 +9,8 @@
 
 import os
 import json
+import glob
+from fnmatch import fnmatchcase
 from pathlib import Path
 
 class AutoloadConfig(object):
@@ -70,3 +72,47 @@ class AutoloadConfig(object):
             if not (key in props):
                 props[key] = {}
 
+
+
+
+class AutoloadRemove(object):
+    """Remove openvpn3-autoload configurations matching names or glob patterns
+
+    A configuration matches if either the file prefix or the profile
+    name stored in the .autoload file matches one of the patterns.
+    """
+
+    def __init__(self, rootdir, patterns):
+        self._config_dir = os.path.join(rootdir, 'etc','openvpn3','autoload')
+        self._matches = []
+
+        for al_file in sorted(glob.glob(os.path.join(self._config_dir, '*.autoload'))):
+            prefix = os.path.basename(al_file)[:-len('.autoload')]
+            names = [prefix,]
+            try:
+                with open(al_file, 'rb') as fp:
+                    props = json.loads(fp.read().decode('utf-8'))
+                if 'name' in props:
+                    names.append(props['name'])
+            except (OSError, ValueError):
+                pass
+
+            for n in names:
+                if len([p for p in patterns if fnmatchcase(n, p)]) > 0:
+                    self._matches.append(al_file)
+                    break
+
+
+    def GetAutoloadFilenames(self):
+        return self._matches
+
+
+    def Remove(self):
+        for al_file in self._matches:
+            cfg_file = al_file[:-len('.autoload')] + '.conf'
+            for f in (al_file, cfg_file):
+                if os.path.exists(f):
+                    print('Removing "%s" ... ' % f, end='', flush=True)
+                    os.unlink(f)
+                    print('Done')
+        return len(self._matches)
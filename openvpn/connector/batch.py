@@ -0,0 +1,32 @@
+#  OpenVPN Connector Setup
+#      - Configure OpenVPN 3 Linux for CloudConnexa™
+#
+#  SPDX-License-Identifier: AGPL-3.0-only
+#
+#  Copyright (C) 2020 - 2023  OpenVPN Inc. <sales@openvpn.net>
+#  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
+#
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of D-Bus calls allowed to be in flight at the same time
+BATCH_MAX_WORKERS = 32
+
+
+def BatchCall(func, items, max_workers=BATCH_MAX_WORKERS):
+    """Run func(item) for each item concurrently, results returned in input order
+
+    Each D-Bus method call is a blocking round-trip to the service.  By
+    issuing them from a thread pool, many calls are kept in flight on the
+    same bus connection instead of waiting for each reply in turn.
+    Exceptions raised by func are re-raised to the caller.
+    """
+
+    items = list(items)
+    if len(items) == 0:
+        return []
+    if len(items) == 1:
+        return [func(items[0]),]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
@@ -9,10 +9,34 @@
 
 import os
 import dbus
+from fnmatch import fnmatchcase
 from openvpn3 import ConfigurationManager
+from openvpn.connector.batch import BatchCall
+
+
+def FetchConfigProfiles(cfgmgr):
+    """Retrieve a list of (name, config object) tuples of all available profiles
+
+    The configuration names are looked up concurrently, which avoids one
+    sequential D-Bus round-trip per profile on hosts with many connectors.
+    Profiles which disappear while being queried are skipped, any other
+    D-Bus error is passed on to the caller.
+    """
+
+    def _get_name(cfg):
+        try:
+            return (str(cfg.GetProperty('name')), cfg)
+        except dbus.exceptions.DBusException as err:
+            if err.get_dbus_name() == 'org.freedesktop.DBus.Error.UnknownObject':
+                return None
+            raise
+
+    return [r for r in BatchCall(_get_name, cfgmgr.FetchAvailableConfigs())
+            if r is not None]
+
 
 class ConfigImport(object):
-    def __init__(self, systembus, cfgname, force=False):
+    def __init__(self, systembus, cfgname, force=False, cfgpath=None):
         self.__system_bus = systembus
         self.__cfgmgr = ConfigurationManager(self.__system_bus)
         self.__config_name = cfgname.replace(' ', '')
@@ -23,6 +47,11 @@ class ConfigImport(object):
             print('** INFO **  Spaces stripped from configuration '
                   + 'name. New name: %s' % self.__config_name)
 
+        if cfgpath is not None:
+            # Continue with a profile imported by an earlier run
+            self._cfgobj = self.__cfgmgr.Retrieve(cfgpath)
+            return
+
         if self.__duplicate_check(self.__config_name, force) == True:
             if not force:
                 raise ValueError('Configuration profile name "%s" already exists' % self.__config_name)
@@ -32,6 +61,10 @@ class ConfigImport(object):
         return self.__config_name
 
 
+    def GetConfigPath(self):
+        return str(self._cfgobj.GetPath())
+
+
     def Import(self, profile):
         if len(self.__overwrite) > 0:
             print('** Warning **  Removing old configuration profile with same name')
@@ -45,14 +78,20 @@ class ConfigImport(object):
         self._cfgobj = self.__cfgmgr.Import(self.__config_name,
                                              profile.GetProfile(),
                                              False, True)
-        self._cfgobj.SetProperty('locked_down', True)
-        self._cfgobj.SetOverride('persist-tun', True)
-        self._cfgobj.SetOverride('log-level', '5')
         print('Done')
         if 'OPENVPN_CONNECTOR_DEBUG' in os.environ:
             print('Configuration path: %s' % self._cfgobj.GetPath())
 
 
+    def ApplyDefaults(self):
+        """Lock down the imported profile and set the connector overrides.
+        This can safely be repeated on an already configured profile."""
+
+        self._cfgobj.SetProperty('locked_down', True)
+        self._cfgobj.SetOverride('persist-tun', True)
+        self._cfgobj.SetOverride('log-level', '5')
+
+
     def EnableDCO(self):
         print('Enabling Data Channel Offload (DCO) ... ', end='', flush=True)
         self._cfgobj.SetProperty('dco', True)
@@ -74,10 +113,52 @@ class ConfigImport(object):
         #       improved support within the net.openvpn.v3.configuration
         #       D-Bus service.
         ret = False
-        for cfg in self.__cfgmgr.FetchAvailableConfigs():
-            n = cfg.GetProperty('name')
+        for (n, cfg) in FetchConfigProfiles(self.__cfgmgr):
             if cfgname == n:
                 ret = True
                 if force:
                     self.__overwrite.insert(0, cfg)
         return ret
+
+
+class ConfigRemove(object):
+    """Remove all configuration profiles matching names or glob patterns"""
+
+    def __init__(self, systembus, patterns):
+        self.__system_bus = systembus
+        self.__cfgmgr = ConfigurationManager(self.__system_bus)
+        self.__patterns = patterns
+        self.__matches = [(n, cfg) for (n, cfg) in FetchConfigProfiles(self.__cfgmgr)
+                          if MatchName(n, self.__patterns)]
+
+
+    def GetConfigNames(self):
+        return sorted(set([n for (n, cfg) in self.__matches]))
+
+
+    def GetConfigPaths(self):
+        return [str(cfg.GetPath()) for (n, cfg) in self.__matches]
+
+
+    def Exclude(self, names):
+        """Keep the configuration profiles with the given names"""
+
+        self.__matches = [(n, cfg) for (n, cfg) in self.__matches if n not in names]
+
+
+    def Remove(self):
+        """Remove all matching configuration profiles concurrently"""
+
+        if 'OPENVPN_CONNECTOR_DEBUG' in os.environ:
+            for (n, cfg) in self.__matches:
+                print('.. Removing %s (%s)' % (cfg.GetPath(), n))
+        BatchCall(lambda m: m[1].Remove(), self.__matches)
+        return len(self.__matches)
+
+
+def MatchName(name, patterns):
+    """Check if a configuration name matches any of the given glob patterns"""
+    for p in patterns:
+        if fnmatchcase(name, p):
+            return True
+    return False
@@ -0,0 +1,205 @@
+#  OpenVPN Connector Setup
+#      - Configure OpenVPN 3 Linux for CloudConnexa™
+#
+#  SPDX-License-Identifier: AGPL-3.0-only
+#
+#  Copyright (C) 2020 - 2023  OpenVPN Inc. <sales@openvpn.net>
+#  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
+#
+
+import os
+import json
+from urllib.parse import quote
+from base64 import b64decode, b64encode
+from pathlib import Path
+
+
+def JournalDirectory(rootdir):
+    """Return the directory where provisioning journals are stored"""
+
+    if os.geteuid() == 0:
+        return os.path.join(rootdir, 'var', 'lib', 'openvpn-connector-setup')
+
+    statedir = os.path.join(os.path.expanduser('~'), '.local', 'state')
+    if 'XDG_STATE_HOME' in os.environ:
+        statedir = os.environ['XDG_STATE_HOME']
+    return os.path.join(statedir, 'openvpn-connector-setup')
+
+
+class JournalError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+
+
+class ProvisionJournal(object):
+    """On-disk record of the completed provisioning steps for a connector
+
+    Each completed step is appended as a single JSON line and flushed to
+    disk before the next step starts.  A later run can then continue
+    after the last committed step instead of starting from scratch.
+    """
+
+    def __init__(self, journal_dir, cfgname):
+        self._journal_dir = journal_dir
+        self._journal_file = os.path.join(self._journal_dir,
+                                          '%s.journal' % self._escape_name(cfgname))
+        self._steps = []
+        self._data = {}
+        self._available = True
+
+
+    def IsAvailable(self):
+        """Returns False if writing the journal failed, --resume will then not work"""
+        return self._available
+
+
+    def GetJournalFilename(self):
+        return self._journal_file
+
+
+    def Load(self):
+        """Load the committed steps from disk, returns False if there is no journal"""
+
+        self._steps = []
+        self._data = {}
+        if not os.path.exists(self._journal_file):
+            return False
+
+        with open(self._journal_file, 'r+b') as fp:
+            raw = fp.read()
+            # Drop an incomplete trailing entry from an interrupted write,
+            # so new entries are not appended to a partial line
+            committed = raw[:raw.rfind(b'\n') + 1]
+            if len(committed) != len(raw):
+                fp.truncate(len(committed))
+
+        for line in committed.decode('utf-8', errors='replace').splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            if not isinstance(entry, dict):
+                raise JournalError('The journal "%s" is corrupt' % self._journal_file)
+            if 'step' in entry:
+                self._steps.append(entry.pop('step'))
+            self._data.update(entry)
+        return True
+
+
+    def Completed(self, step):
+        return step in self._steps
+
+
+    def GetLastStep(self):
+        if len(self._steps) == 0:
+            return None
+        return self._steps[-1]
+
+
+    def Get(self, key, default=None):
+        return self._data.get(key, default)
+
+
+    def GetChangedOptions(self, options):
+        """Return the names of the options which differ from the ones
+        recorded in the journal.  Options given as None are not compared."""
+
+        recorded = self._data.get('options', {})
+        return sorted([k for (k, v) in options.items()
+                       if v is not None and recorded.get(k) != v])
+
+
+    def Commit(self, step, **data):
+        """Record a completed step, with optional data, persistently on disk"""
+
+        entry = dict(data)
+        entry['step'] = step
+        self._safe_write([entry,], os.O_APPEND)
+        self._steps.append(step)
+        self._data.update(data)
+
+
+    def StoreProfile(self, profile):
+        """Save the decrypted profile, so a resumed setup can import it
+        without downloading and decrypting it again"""
+
+        data = {'profile': b64encode(profile).decode('ascii')}
+        if self._safe_write([data,], os.O_APPEND):
+            self._data.update(data)
+
+
+    def GetProfile(self):
+        """Return the decrypted profile stored in the journal, or None"""
+
+        if 'profile' not in self._data:
+            return None
+        return b64decode(self._data['profile'])
+
+
+    def Compact(self, drop=()):
+        """Rewrite the journal as a single entry, leaving out the keys in drop"""
+
+        for key in drop:
+            self._data.pop(key, None)
+        entries = [{'step': s} for s in self._steps[:-1]]
+        last = dict(self._data)
+        last['step'] = self._steps[-1]
+        entries.append(last)
+
+        tmpfile = self._journal_file + '.tmp'
+        if self._safe_write(entries, os.O_TRUNC, tmpfile):
+            try:
+                os.replace(tmpfile, self._journal_file)
+            except OSError as err:
+                self._write_failed(err)
+
+
+    def Discard(self):
+        """Remove the journal, used when provisioning completed or starts over"""
+
+        self._steps = []
+        self._data = {}
+        try:
+            if os.path.exists(self._journal_file):
+                os.unlink(self._journal_file)
+        except OSError as err:
+            self._write_failed(err)
+
+
+    def _escape_name(self, cfgname):
+        # Keep the journal file inside the journal directory, whatever
+        # characters the configuration profile name contains
+        name = quote(cfgname, safe='')
+        if name.startswith('.'):
+            name = '%2E' + name[1:]
+        return name
+
+
+    def _write_failed(self, err):
+        if self._available:
+            print('\n** WARNING **  Could not write the setup journal: %s\n' % str(err)
+                  + '               --resume will not be available for this setup')
+        self._available = False
+
+
+    def _safe_write(self, entries, flags, filename=None):
+        if not self._available:
+            return False
+        try:
+            self._write(entries, flags, filename)
+            return True
+        except OSError as err:
+            self._write_failed(err)
+            return False
+
+
+    def _write(self, entries, flags, filename=None):
+        Path(self._journal_dir).mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(filename or self._journal_file,
+                     os.O_WRONLY | os.O_CREAT | flags, 0o600)
+        try:
+            for e in entries:
+                os.write(fd, (json.dumps(e) + '\n').encode('utf-8'))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
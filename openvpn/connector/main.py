@@ -9,16 +9,23 @@
 
 import sys
 import os
+import time
+import hashlib
 import argparse
 import dbus
 from enum import Enum
+from openvpn3 import SessionManager
 from openvpn.connector.version import ocs_version as version
 from openvpn.connector.token import DecodeToken
-from openvpn.connector.profile import ProfileFetch, DecryptError, DownloadError
-from openvpn.connector.autoload import AutoloadConfig
-from openvpn.connector.configmgr import ConfigImport
-from openvpn.connector.systemd import SystemdServiceUnit
+from openvpn.connector.profile import ProfileFetch, DecryptedProfile, DecryptError, DownloadError
+from openvpn.connector.autoload import AutoloadConfig, AutoloadRemove
+from openvpn.connector.configmgr import ConfigImport, ConfigRemove, MatchName
+from openvpn.connector.systemd import SystemdServiceUnit, SystemdServiceUnitSet
 from openvpn.connector.polkit import PolkitAuthCheck
+from openvpn.connector.journal import ProvisionJournal, JournalDirectory, JournalError
+from openvpn.connector.status import ConnectorStatus, FormatStatusTable, FormatStatusJSON
+from openvpn.connector.status import SessionUnitName, SessionUnitConfigName, FetchLoadedSessionUnits
+from openvpn.connector.sessionmgr import FetchSessions, DisconnectSessions
 
 
 # Add the traceback module if we're in debugging mode.
@@ -48,11 +55,189 @@ class ConfigModes(Enum):
         raise ValueError('Incorrect configuration mode: "%s"' % v)
 
 
+def token_digest(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def save_resume_profile(journal, profile):
+    # The decrypted profile is only written to disk when the setup failed
+    # before it was imported, so --resume does not need to download it again
+    if journal.Completed('imported') or journal.Completed('saved'):
+        return
+    if journal.GetProfile() is None and profile is not None and profile.HasProfile():
+        journal.StoreProfile(profile.GetProfile().encode('utf-8'))
+
+    if journal.GetProfile() is not None:
+        print('\n** WARNING **  The decrypted VPN profile, including its private key, is\n'
+              + '               stored in %s\n' % journal.GetJournalFilename()
+              + '               It is removed when the setup completes.  Delete this file\n'
+              + '               if you will not run the setup again with --resume.')
+
+
+def get_rootdir():
+    # By default the root installation directory is /
+    # but for development and debugging, the root directory
+    # can be put into a chroot.  This is done via the
+    # OPENVPN_CONNECTOR_ROOT_DIR environment variable which
+    # must be set before this script is run.
+    if 'OPENVPN_CONNECTOR_ROOT_DIR' in os.environ:
+        return os.environ['OPENVPN_CONNECTOR_ROOT_DIR']
+    return '/'
+
+
+def status_main(args):
+    cli = argparse.ArgumentParser(prog='openvpn-connector-setup status',
+                                  description='List all connectors configured on this host',
+                                  usage='%s status [options]' % os.path.basename(sys.argv[0]))
+    cli.add_argument('--json', action='store_true',
+                     help='Report the connector status as JSON')
+    cliopts = cli.parse_args(args)
+
+    try:
+        start = time.monotonic()
+        connectors = ConnectorStatus(dbus.SystemBus()).Collect()
+        if 'OPENVPN_CONNECTOR_DEBUG' in os.environ:
+            print('Status collected in %.3f seconds' % (time.monotonic() - start))
+
+        if cliopts.json:
+            print(FormatStatusJSON(connectors))
+        else:
+            print(FormatStatusTable(connectors))
+
+    except BaseException as err:
+        print('\n** ERROR **  ' + str(err))
+
+        if 'OPENVPN_CONNECTOR_DEBUG' in os.environ:
+            print ('\nstatus traceback:')
+            print (traceback.format_exc())
+
+        sys.exit(3)
+
+
+def match_sessions(sessions, cfgremove, patterns):
+    cfgpaths = cfgremove.GetConfigPaths()
+    return [sess for sess in sessions
+            if sess['config_path'] in cfgpaths or MatchName(sess['config_name'], patterns)]
+
+
+def remove_main(args):
+    cli = argparse.ArgumentParser(prog='openvpn-connector-setup remove',
+                                  description='Stop, disable and remove connectors',
+                                  usage='%s remove [options] NAME [NAME ...]' % os.path.basename(sys.argv[0]))
+    cli.add_argument('names', metavar='NAME', nargs='+',
+                     help='Configuration profile names or glob patterns to remove')
+    cli.add_argument('--dry-run', action='store_true',
+                     help='Only list what would be removed')
+    cliopts = cli.parse_args(args)
+
+    rootdir = get_rootdir()
+    patterns = [n.replace(' ', '') for n in cliopts.names]
+
+    try:
+        start = time.monotonic()
+        systembus = dbus.SystemBus()
+        cfgremove = ConfigRemove(systembus, patterns)
+        alremove = AutoloadRemove(rootdir, patterns)
+        units = SystemdServiceUnitSet(systembus)
+        sessmgr = SessionManager(systembus)
+
+        # Session units may exist without an imported configuration profile,
+        # so include all loaded session units matching the patterns.  The
+        # units of the matching profiles are included when enabled.
+        active = FetchLoadedSessionUnits(units)
+        filestates = units.GetUnitFileStates(
+            [SessionUnitName(n) for n in cfgremove.GetConfigNames()])
+        unit_names = sorted(set([u for u in active.keys()
+                                 if MatchName(SessionUnitConfigName(u), patterns)])
+                            | set([u for (u, state) in filestates.items()
+                                   if state.startswith('enabled')]))
+
+        sessions = match_sessions(FetchSessions(sessmgr), cfgremove, patterns)
+        if len(unit_names) == 0 and len(sessions) == 0 \
+           and len(cfgremove.GetConfigNames()) == 0 \
+           and len(alremove.GetAutoloadFilenames()) == 0:
+            raise RuntimeError('No connectors found matching: %s' % ' '.join(patterns))
+
+        pkac = PolkitAuthCheck(systembus)
+        admin_access = os.geteuid() == 0 or pkac.CheckAuthorization('org.freedesktop.systemd1.manage-unit-files')
+
+        # Without admin access the units cannot be disabled.  Removing their
+        # profiles would leave units behind which start profiles that no
+        # longer exist, so those connectors are kept.
+        kept = []
+        if admin_access is not True and len(unit_names) > 0:
+            kept = [SessionUnitConfigName(u) for u in unit_names]
+            cfgremove.Exclude(kept)
+            sessions = [sess for sess in sessions if sess['config_name'] not in kept]
+            print('\n** INFO **   You did not run this command as root, so these connectors\n'
+                  + '             are kept as their service units cannot be disabled.  To remove\n'
+                  + '             them, as root, run these commands: \n\n'
+                  + '             # systemctl disable --now %s\n' % ' '.join(unit_names)
+                  + '             # %s remove %s\n' % (os.path.basename(sys.argv[0]), ' '.join(kept)))
+            unit_names = []
+
+        if cliopts.dry_run:
+            for u in unit_names:
+                print('Would stop and disable %s' % u)
+            for sess in sessions:
+                print('Would disconnect session %s (%s)' % (sess['session_path'], sess['config_name']))
+            for n in cfgremove.GetConfigNames():
+                print('Would remove configuration profile "%s"' % n)
+            for f in alremove.GetAutoloadFilenames():
+                print('Would remove openvpn3-autoload config "%s"' % f)
+            return
+
+        if len(unit_names) > 0:
+            print('Stopping and disabling %i openvpn3-session@ service unit(s) ... ' % len(unit_names),
+                  end='', flush=True)
+            units.Disable(unit_names)
+            units.Stop(unit_names)
+            print('Done')
+
+        # Sessions started by openvpn3-autoload or manually are not
+        # managed by any service unit and must be disconnected directly.
+        # Sessions of the stopped units are gone by now.
+        sessions = [sess for sess in match_sessions(FetchSessions(sessmgr), cfgremove, patterns)
+                    if sess['config_name'] not in kept]
+        if len(sessions) > 0:
+            print('Disconnecting %i VPN session(s) ... ' % len(sessions), end='', flush=True)
+            DisconnectSessions(sessions)
+            print('Done')
+
+        print('Removing %i VPN configuration profile(s) ... ' % len(cfgremove.GetConfigNames()),
+              end='', flush=True)
+        cfgremove.Remove()
+        print('Done')
+
+        alremove.Remove()
+
+        removed = set(cfgremove.GetConfigNames()) | set([SessionUnitConfigName(u) for u in unit_names])
+        print('Removed %i connector(s) and %i autoload config(s) in %.3f seconds' % (
+            len(removed), len(alremove.GetAutoloadFilenames()), time.monotonic() - start))
+
+    except BaseException as err:
+        print('\n** ERROR **  ' + str(err))
+
+        if 'OPENVPN_CONNECTOR_DEBUG' in os.environ:
+            print ('\nremove traceback:')
+            print (traceback.format_exc())
+
+        sys.exit(3)
+
+
 def main():
+    if len(sys.argv) > 1 and 'status' == sys.argv[1]:
+        status_main(sys.argv[2:])
+        sys.exit(0)
+    elif len(sys.argv) > 1 and 'remove' == sys.argv[1]:
+        remove_main(sys.argv[2:])
+        sys.exit(0)
+
     run_mode = ConfigModes.UNITFILE
     cli = argparse.ArgumentParser(prog='openvpn-connector-setup',
                                   description='OpenVPN Connector Setup utility',
-                                  usage='%s [options]' % os.path.basename(sys.argv[0]))
+                                  usage='%s [options]\n       %s status [options]\n       %s remove [options] NAME [NAME ...]' % (
+                                      (os.path.basename(sys.argv[0]),) * 3))
     cli.add_argument('--mode', metavar='MODE', nargs=1, action='store',
                      help='Defines how configuration profiles are imported and stored (default: %s)' % ConfigModes.to_string(run_mode))
     cli.add_argument('--token', metavar='TOKEN_VALUE', nargs=1,
@@ -67,6 +252,8 @@ def main():
                      help='Do not start and configure the profile to start at boot')
     cli.add_argument('--dco', action='store_true',
                      help='Use OpenVPN Data Channel Offload (DCO) by default')
+    cli.add_argument('--resume', action='store_true',
+                     help='Continue a previously failed setup from the last completed step')
     cli.add_argument('--version', action='store_true',
                      help='Show openvpn-connector-setup version')
 
@@ -90,21 +277,52 @@ def main():
     if 'OPENVPN_CONNECTOR_DEBUG' in os.environ:
         print('Run mode: %s' % ConfigModes.to_string(run_mode))
 
-    # By default the root installation directory is /
-    # but for development and debugging, the root directory
-    # can be put into a chroot.  This is done via the
-    # OPENVPN_CONNECTOR_ROOT_DIR environment variable which
-    # must be set before this script is run.
-    rootdir = '/'
-    if 'OPENVPN_CONNECTOR_ROOT_DIR' in os.environ:
-        rootdir = os.environ['OPENVPN_CONNECTOR_ROOT_DIR']
+    rootdir = get_rootdir()
 
     if ConfigModes.AUTOLOAD == run_mode and '/' == rootdir and os.geteuid() != 0:
         print('%s must be run as root with "%s" as top level installation directory ' % (
                   os.path.basename(sys.argv[0]), rootdir))
         sys.exit(2)
 
-    if cliopts.token is None:
+    # The options a setup is resumed with must match the recorded ones,
+    # otherwise they would be silently ignored for the completed steps.
+    # The token is only compared when given and is recorded as a digest.
+    options = {'--mode': ConfigModes.to_string(run_mode),
+               '--dco': dco,
+               '--no-start': not start_config,
+               '--autoload-file-prefix': autoload_prefix,
+               '--token': cliopts.token and token_digest(cliopts.token[0]) or None}
+
+    # The journal records each completed step, so a failed setup can
+    # be continued with --resume without downloading and importing the
+    # profile once more.  A setup without --resume always starts over.
+    try:
+        journal = ProvisionJournal(JournalDirectory(rootdir), config_name.replace(' ', ''))
+        if cliopts.resume and journal.Load():
+            changed = journal.GetChangedOptions(options)
+            if len(changed) > 0:
+                raise JournalError('The setup being resumed used different %s option values'
+                                   % ', '.join(changed))
+            print('Resuming setup of "%s" after the "%s" step\n' % (config_name, journal.GetLastStep()))
+        else:
+            journal.Discard()
+    except (JournalError, OSError) as err:
+        if cliopts.resume:
+            print('** ERROR **  Cannot resume the setup: ' + str(err))
+            print('Rerun the command without --resume to start over')
+        else:
+            print('** ERROR **  ' + str(err))
+        sys.exit(2)
+
+    # The profile is only needed until it has been imported or saved.
+    # A failed setup leaves it in the journal for --resume.
+    need_download = not (journal.Completed('imported') or journal.Completed('saved')) \
+        and journal.GetProfile() is None
+    profile = None
+
+    if not need_download:
+        pass
+    elif cliopts.token is None:
         print("""CloudConnexa™ Connector Setup
 
 This utility is used to configure this host as an OpenVPN Connector
@@ -124,69 +342,97 @@ proper VPN configuration profile and complete the configuration.\n""")
         token = cliopts.token[0]
 
     try:
-        # Parse the setup token.  This contains
-        # the profile name which needs to be downloaded
-        # and a key used to decrypt the downloaded profile
-        token = DecodeToken(token)
-
         systembus = dbus.SystemBus()
         cfgimport = None
         if ConfigModes.UNITFILE == run_mode:
-            cfgimport = ConfigImport(systembus, config_name, force)
-
-        # Download the profile from CloudConnexa
-        profile = ProfileFetch(token)
-        print('Downloading CloudConnexa Connector profile ... ', end='', flush=True)
-        profile.Download()
-        print('Done')
+            cfgimport = ConfigImport(systembus, config_name, force,
+                                     journal.Get('config_path'))
+
+        if journal.GetProfile() is not None:
+            profile = DecryptedProfile(journal.GetProfile())
+        elif need_download:
+            options['--token'] = token_digest(token)
+
+            # Parse the setup token.  This contains
+            # the profile name which needs to be downloaded
+            # and a key used to decrypt the downloaded profile
+            token = DecodeToken(token)
+
+            # Download the profile from CloudConnexa
+            profile = ProfileFetch(token)
+            print('Downloading CloudConnexa Connector profile ... ', end='', flush=True)
+            profile.Download()
+            print('Done')
+            if not journal.Completed('fetched'):
+                journal.Commit('fetched', options=options)
 
         pkac = PolkitAuthCheck(systembus)
         admin_access = os.geteuid() == 0 or pkac.CheckAuthorization('org.freedesktop.systemd1.manage-unit-files')
 
         if ConfigModes.AUTOLOAD == run_mode:
-            # Generate the openvpn3-autoload configuration
-            autoload = AutoloadConfig(profile, rootdir, autoload_prefix)
-            autoload.SetName(config_name)
-            autoload.SetAutostart(True)
-            autoload.SetTunnelParams('persist', True)
-            autoload.Save()
+            if not journal.Completed('saved'):
+                # Generate the openvpn3-autoload configuration
+                autoload = AutoloadConfig(profile, rootdir, autoload_prefix)
+                autoload.SetName(config_name)
+                autoload.SetAutostart(True)
+                autoload.SetTunnelParams('persist', True)
+                autoload.Save()
+                journal.Commit('saved')
+                if journal.GetProfile() is not None:
+                    journal.Compact(drop=('profile',))
 
             if dco:
                 print('** WARNING ** The openvpn3-autoload mode does not support enabling DCO')
 
             if start_config is True and '/' == rootdir and admin_access:
                 service = SystemdServiceUnit(systembus, 'openvpn3-autoload.service')
-                print('Enabling openvpn3-autoload.service during boot ... ', end='', flush=True)
-                service.Enable()
-                print('Done')
+                if not journal.Completed('enabled'):
+                    print('Enabling openvpn3-autoload.service during boot ... ', end='', flush=True)
+                    service.Enable()
+                    print('Done')
+                    journal.Commit('enabled')
 
-                print('Starting openvpn3-autoload.service ... ', end='', flush=True)
-                service.Start()
-                print('Done')
+                if not journal.Completed('started'):
+                    print('Starting openvpn3-autoload.service ... ', end='', flush=True)
+                    service.Start()
+                    print('Done')
+                    journal.Commit('started')
 
         elif ConfigModes.UNITFILE == run_mode:
-            cfgimport.Import(profile)
+            if not journal.Completed('imported'):
+                cfgimport.Import(profile)
+                journal.Commit('imported', config_path=cfgimport.GetConfigPath())
+                if journal.GetProfile() is not None:
+                    journal.Compact(drop=('profile',))
+
+            if not journal.Completed('configured'):
+                cfgimport.ApplyDefaults()
 
-            if cliopts.dco:
-                cfgimport.EnableDCO()
+                if cliopts.dco:
+                    cfgimport.EnableDCO()
 
-            if os.geteuid() != 0:
-                cfgimport.EnableOwnershipTransfer()
+                if os.geteuid() != 0:
+                    cfgimport.EnableOwnershipTransfer()
+                journal.Commit('configured')
 
             if start_config is True:
                 if admin_access is True:
                     service = SystemdServiceUnit(systembus,
                                                  'openvpn3-session@%s.service' % cfgimport.GetConfigName())
 
-                    print('Enabling openvpn3-session@%s.service during boot ... ' % cfgimport.GetConfigName(),
-                          end='', flush=True)
-                    service.Enable()
-                    print('Done')
-
-                    print('Starting openvpn3-session@%s.service ... ' % cfgimport.GetConfigName(),
-                          end='', flush=True)
-                    service.Start()
-                    print('Done')
+                    if not journal.Completed('enabled'):
+                        print('Enabling openvpn3-session@%s.service during boot ... ' % cfgimport.GetConfigName(),
+                              end='', flush=True)
+                        service.Enable()
+                        print('Done')
+                        journal.Commit('enabled')
+
+                    if not journal.Completed('started'):
+                        print('Starting openvpn3-session@%s.service ... ' % cfgimport.GetConfigName(),
+                              end='', flush=True)
+                        service.Start()
+                        print('Done')
+                        journal.Commit('started')
                 else:
                     print('\n** INFO **   You did not run this command as root, so it will not\n'
                           + '             start the connection automatically during boot.  To start\n'
@@ -194,6 +440,9 @@ proper VPN configuration profile and complete the configuration.\n""")
                           + '             # systemctl enable --now openvpn3-session@%s.service\n' %
                           cfgimport.GetConfigName())
 
+        # All steps completed, the journal is no longer needed
+        journal.Discard()
+
     except DownloadError as err:
         print('\n** ERROR ** ' + str(err))
         print('URL: ' + err.GetURL())
@@ -208,4 +457,8 @@ proper VPN configuration profile and complete the configuration.\n""")
             print ('\nmain traceback:')
             print (traceback.format_exc())
 
+        if journal.GetLastStep() is not None and journal.IsAvailable():
+            save_resume_profile(journal, profile)
+            print('\nRun the same command with --resume to continue after the "%s" step'
+                  % journal.GetLastStep())
         sys.exit(3)
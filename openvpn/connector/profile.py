@@ -107,12 +107,38 @@ class DecryptProfile(object):
 
 
 
-class ProfileFetch(object):
+class DecryptedProfile(object):
+    """A decrypted CloudConnexa configuration profile"""
+
+    def __init__(self, profile=None):
+        self._profile = profile
+
+
+    def HasProfile(self):
+        """Check if the decrypted profile is available"""
+        return self._profile is not None
+
+
+    def Save(self, dest):
+        """Save the downloaded and decrypted profile to disk"""
+        fp = open(dest, 'wb')
+        fp.write(self._profile)
+        fp.close()
+
+
+    def GetProfile(self):
+        """Retrieve the downloaded and decrypted profile as a string"""
+        return self._profile.decode('utf-8')
+
+
+
+class ProfileFetch(DecryptedProfile):
     """Download an encrypted CloudConnexa configuration profile"""
 
     def __init__(self, token, baseurl=CLOUDCONNEXA_BASEURL):
         if not isinstance(token, DecodeToken):
             raise ValueError('token argument is not an DecodeToken object')
+        super().__init__()
         self.__baseurl = baseurl
         self.__token = token
 
@@ -131,16 +157,4 @@ class ProfileFetch(object):
 
         b64prf = res.read().decode('utf-8')
         decrypt = DecryptProfile(self.__token.GetKey())
-        self.__profile = decrypt.Retrieve(b64prf)
-
-
-    def Save(self, dest):
-        """Save the downloaded and decrypted profile to disk"""
-        fp = open(dest, 'wb')
-        fp.write(self.__profile)
-        fp.close()
-
-
-    def GetProfile(self):
-        """Retrieve the downloaded and decrypted profile as a string"""
-        return self.__profile.decode('utf-8')
+        self._profile = decrypt.Retrieve(b64prf)
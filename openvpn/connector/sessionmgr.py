@@ -0,0 +1,42 @@
+#  OpenVPN Connector Setup
+#      - Configure OpenVPN 3 Linux for CloudConnexa™
+#
+#  SPDX-License-Identifier: AGPL-3.0-only
+#
+#  Copyright (C) 2020 - 2023  OpenVPN Inc. <sales@openvpn.net>
+#  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
+#
+
+import dbus
+from openvpn.connector.batch import BatchCall
+
+
+def FetchSessions(sessmgr):
+    """Retrieve a list of dictionaries describing all available VPN sessions
+
+    The session properties are looked up concurrently.  Sessions which
+    disappear while being queried are skipped, any other D-Bus error is
+    passed on to the caller.
+    """
+
+    def _get_session(sess):
+        try:
+            status = sess.GetStatus()
+            return {'session': sess,
+                    'session_path': str(sess.GetPath()),
+                    'config_path': str(sess.GetProperty('config_path')),
+                    'config_name': str(sess.GetProperty('config_name')),
+                    'status': status['minor'].name}
+        except dbus.exceptions.DBusException as err:
+            if err.get_dbus_name() == 'org.freedesktop.DBus.Error.UnknownObject':
+                return None
+            raise
+
+    return [r for r in BatchCall(_get_session, sessmgr.FetchAvailableSessions())
+            if r is not None]
+
+
+def DisconnectSessions(sessions):
+    """Disconnect all the given sessions, as returned by FetchSessions(), concurrently"""
+
+    BatchCall(lambda s: s['session'].Disconnect(), sessions)
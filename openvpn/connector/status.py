@@ -0,0 +1,124 @@
+#  OpenVPN Connector Setup
+#      - Configure OpenVPN 3 Linux for CloudConnexa™
+#
+#  SPDX-License-Identifier: AGPL-3.0-only
+#
+#  Copyright (C) 2020 - 2023  OpenVPN Inc. <sales@openvpn.net>
+#  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
+#
+
+import json
+from openvpn3 import ConfigurationManager, SessionManager
+from openvpn.connector.batch import BatchCall
+from openvpn.connector.configmgr import FetchConfigProfiles
+from openvpn.connector.sessionmgr import FetchSessions
+from openvpn.connector.systemd import SystemdServiceUnitSet
+
+SESSION_UNIT_PREFIX = 'openvpn3-session@'
+SESSION_UNIT_SUFFIX = '.service'
+
+
+def SessionUnitName(cfgname):
+    """Return the systemd service unit name used to start a configuration profile"""
+    return '%s%s%s' % (SESSION_UNIT_PREFIX, cfgname, SESSION_UNIT_SUFFIX)
+
+
+def SessionUnitConfigName(unit_name):
+    """Return the configuration profile name of an openvpn3-session@ service unit"""
+    return unit_name[len(SESSION_UNIT_PREFIX):-len(SESSION_UNIT_SUFFIX)]
+
+
+def FetchLoadedSessionUnits(units):
+    """Retrieve a dictionary of unit name to active state of all loaded
+    openvpn3-session@ service units, using a single D-Bus call
+
+    Session units which are enabled but not loaded are not included;
+    their unit file state must be looked up by the unit name.
+    """
+
+    active = units.GetActiveStates(SessionUnitName('*'))
+
+    # The pattern also matches the openvpn3-session@.service template unit
+    active.pop(SessionUnitName(''), None)
+    return active
+
+
+class ConnectorStatus(object):
+    """Collect an inventory of all connectors configured on this host
+
+    The configuration manager, the session manager and systemd are
+    queried concurrently and the results are joined per configuration
+    profile name.
+    """
+
+    def __init__(self, systembus):
+        self.__system_bus = systembus
+        self.__cfgmgr = ConfigurationManager(self.__system_bus)
+        self.__sessmgr = SessionManager(self.__system_bus)
+        self.__units = SystemdServiceUnitSet(self.__system_bus)
+
+
+    def Collect(self):
+        """Returns a list of dictionaries, one per connector, sorted by name"""
+
+        (configs, sessions, active) = BatchCall(lambda f: f(), [
+            lambda: FetchConfigProfiles(self.__cfgmgr),
+            lambda: FetchSessions(self.__sessmgr),
+            lambda: FetchLoadedSessionUnits(self.__units)])
+
+        connectors = {}
+        for (name, cfg) in configs:
+            connectors[name] = self.__new_entry(name, str(cfg.GetPath()))
+
+        # Include loaded session units without a matching configuration profile
+        for unit in active.keys():
+            name = SessionUnitConfigName(unit)
+            if name not in connectors:
+                connectors[name] = self.__new_entry(name, None)
+
+        filestates = self.__units.GetUnitFileStates(
+            [c['unit'] for c in connectors.values()])
+
+        by_cfgpath = {}
+        for sess in sessions:
+            by_cfgpath[sess['config_path']] = (sess['session_path'], sess['status'])
+
+        for c in connectors.values():
+            c['unit_file_state'] = filestates[c['unit']]
+            c['active_state'] = active.get(c['unit'], 'inactive')
+            if c['config_path'] in by_cfgpath:
+                (c['session_path'], c['session_status']) = by_cfgpath[c['config_path']]
+
+        return [connectors[n] for n in sorted(connectors.keys())]
+
+
+    def __new_entry(self, name, cfgpath):
+        return {'name': name,
+                'config_path': cfgpath,
+                'unit': SessionUnitName(name),
+                'unit_file_state': None,
+                'active_state': None,
+                'session_path': None,
+                'session_status': None}
+
+
+def FormatStatusTable(connectors):
+    """Format the result of ConnectorStatus.Collect() as a text table"""
+
+    header = ('Name', 'Unit file', 'Unit state', 'Session status')
+    rows = [(c['name'],
+             c['unit_file_state'] or '-',
+             c['active_state'] or '-',
+             c['session_status'] or '-') for c in connectors]
+
+    widths = [max([len(r[i]) for r in rows + [header,]]) for i in range(len(header))]
+    fmt = '  '.join(['%%-%is' % w for w in widths])
+    lines = [fmt % header, '  '.join(['-' * w for w in widths])]
+    lines += [fmt % r for r in rows]
+    return '\n'.join([l.rstrip() for l in lines])
+
+
+def FormatStatusJSON(connectors):
+    """Format the result of ConnectorStatus.Collect() as JSON"""
+
+    return json.dumps(connectors, indent=4)
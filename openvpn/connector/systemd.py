@@ -7,7 +7,19 @@
 #  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
 #
 
+import time
 import dbus
+from openvpn.connector.batch import BatchCall
+
+
+def _systemd_manager(dbuscon):
+    # Retrieve access to the main systemd manager object
+    srvmngr_obj = dbuscon.get_object('org.freedesktop.systemd1',
+                                     '/org/freedesktop/systemd1')
+    # Establish a link to the manager interface in the manager object
+    return dbus.Interface(srvmngr_obj,
+                          dbus_interface='org.freedesktop.systemd1.Manager')
+
 
 class SystemdServiceUnit(object):
     """Simple implementation for managing systemd services"""
@@ -15,13 +27,7 @@ class SystemdServiceUnit(object):
     def __init__(self, dbuscon, unit_name):
         self._dbuscon = dbuscon
         self._unit_name = unit_name
-
-        # Retrieve access to the main systemd manager object
-        self._srvmngr_obj = self._dbuscon.get_object('org.freedesktop.systemd1',
-                                                     '/org/freedesktop/systemd1')
-        # Establish a link to the manager interface in the manager object
-        self._srvmgr = dbus.Interface(self._srvmngr_obj,
-                                      dbus_interface='org.freedesktop.systemd1.Manager')
+        self._srvmgr = _systemd_manager(self._dbuscon)
 
     def Enable(self):
         """Enable a systemd service unit to be started at boot"""
@@ -32,3 +38,64 @@ class SystemdServiceUnit(object):
         """Start a systemd service unit"""
 
         self._srvmgr.StartUnit(self._unit_name, 'replace')
+
+
+class SystemdServiceUnitSet(object):
+    """Batched queries and operations on a set of systemd service units"""
+
+    def __init__(self, dbuscon):
+        self._dbuscon = dbuscon
+        self._srvmgr = _systemd_manager(self._dbuscon)
+
+    def GetActiveStates(self, pattern):
+        """Retrieve a dictionary of unit name to active state for all loaded
+        units matching a glob pattern, using a single D-Bus call"""
+
+        units = self._srvmgr.ListUnitsByPatterns([], [pattern,])
+        return {str(u[0]): str(u[3]) for u in units}
+
+    def GetUnitFileStates(self, unit_names):
+        """Retrieve a dictionary of unit name to unit file state (enabled,
+        disabled, ...) for all the given units.  The lookups are issued
+        concurrently.
+
+        Template instances, like openvpn3-session@NAME.service, are enabled
+        through symlinks in the *.wants/ directories only.  Those are not
+        reported by ListUnitFilesByPatterns, so each unit is looked up.
+        """
+
+        def _get_state(unit_name):
+            try:
+                return str(self._srvmgr.GetUnitFileState(unit_name))
+            except dbus.exceptions.DBusException as err:
+                if err.get_dbus_name() == 'org.freedesktop.systemd1.NoSuchUnit':
+                    return 'not-found'
+                raise
+
+        unit_names = list(unit_names)
+        return dict(zip(unit_names, BatchCall(_get_state, unit_names)))
+
+    def Stop(self, unit_names, timeout=90):
+        """Stop all the given units and wait until all the stop jobs have completed
+
+        The stop jobs are queued concurrently.  The systemd job queue is then
+        polled with a single ListJobs call per round until none of the jobs
+        are left.
+        """
+
+        jobs = set([str(j) for j in
+                    BatchCall(lambda u: self._srvmgr.StopUnit(u, 'replace'), unit_names)])
+        deadline = time.monotonic() + timeout
+        while True:
+            jobs &= set([str(j[4]) for j in self._srvmgr.ListJobs()])
+            if len(jobs) == 0:
+                return
+            if time.monotonic() > deadline:
+                raise RuntimeError('Timed out waiting for %i service unit(s) to stop' % len(jobs))
+            time.sleep(0.1)
+
+    def Disable(self, unit_names):
+        """Disable all the given units from being started at boot, in a single call"""
+
+        if len(unit_names) > 0:
+            self._srvmgr.DisableUnitFiles(list(unit_names), False)
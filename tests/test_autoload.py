@@ -0,0 +1,85 @@
+#  OpenVPN Connector Setup
+#      - Configure OpenVPN 3 Linux for CloudConnexa™
+#
+#  SPDX-License-Identifier: AGPL-3.0-only
+#
+#  Copyright (C) 2020 - 2023  OpenVPN Inc. <sales@openvpn.net>
+#  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
+#
+
+import os
+import json
+import tempfile
+import unittest
+from openvpn.connector.autoload import AutoloadRemove
+
+
+class AutoloadRemoveTests(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.rootdir = self._tmpdir.name
+        self.config_dir = os.path.join(self.rootdir, 'etc', 'openvpn3', 'autoload')
+        os.makedirs(self.config_dir)
+
+        self._add_config('connector', 'site-a-1')
+        self._add_config('site-b-1', 'CloudConnexa')
+        self._add_config('other', 'other')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _add_config(self, prefix, name):
+        with open(os.path.join(self.config_dir, prefix + '.autoload'), 'w') as fp:
+            json.dump({'name': name, 'autostart': True}, fp)
+        with open(os.path.join(self.config_dir, prefix + '.conf'), 'w') as fp:
+            fp.write('client\n')
+
+    def _file(self, filename):
+        return os.path.join(self.config_dir, filename)
+
+    def test_match_by_name(self):
+        r = AutoloadRemove(self.rootdir, ['site-a-*'])
+        self.assertEqual([self._file('connector.autoload')], r.GetAutoloadFilenames())
+
+    def test_match_by_prefix(self):
+        r = AutoloadRemove(self.rootdir, ['site-b-*'])
+        self.assertEqual([self._file('site-b-1.autoload')], r.GetAutoloadFilenames())
+
+    def test_match_several(self):
+        r = AutoloadRemove(self.rootdir, ['site-*', 'other'])
+        self.assertEqual([self._file('connector.autoload'),
+                          self._file('other.autoload'),
+                          self._file('site-b-1.autoload')],
+                         r.GetAutoloadFilenames())
+
+    def test_no_match(self):
+        r = AutoloadRemove(self.rootdir, ['nothing*'])
+        self.assertEqual([], r.GetAutoloadFilenames())
+        self.assertEqual(0, r.Remove())
+        self.assertEqual(6, len(os.listdir(self.config_dir)))
+
+    def test_unreadable_autoload_file(self):
+        with open(self._file('broken.autoload'), 'w') as fp:
+            fp.write('{not json')
+        self.assertEqual([self._file('broken.autoload')],
+                         AutoloadRemove(self.rootdir, ['broken']).GetAutoloadFilenames())
+        self.assertEqual([], AutoloadRemove(self.rootdir, ['site-x']).GetAutoloadFilenames())
+
+    def test_remove(self):
+        r = AutoloadRemove(self.rootdir, ['site-a-*'])
+        self.assertEqual(1, r.Remove())
+        self.assertEqual(['other.autoload', 'other.conf', 'site-b-1.autoload', 'site-b-1.conf'],
+                         sorted(os.listdir(self.config_dir)))
+
+    def test_remove_without_conf(self):
+        os.unlink(self._file('other.conf'))
+        self.assertEqual(1, AutoloadRemove(self.rootdir, ['other']).Remove())
+        self.assertFalse(os.path.exists(self._file('other.autoload')))
+
+    def test_missing_directory(self):
+        r = AutoloadRemove(os.path.join(self.rootdir, 'nonexisting'), ['*'])
+        self.assertEqual([], r.GetAutoloadFilenames())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#  OpenVPN Connector Setup
+#      - Configure OpenVPN 3 Linux for CloudConnexa™
+#
+#  SPDX-License-Identifier: AGPL-3.0-only
+#
+#  Copyright (C) 2020 - 2023  OpenVPN Inc. <sales@openvpn.net>
+#  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
+#
+
+import unittest
+
+try:
+    from openvpn.connector.configmgr import MatchName
+    HAVE_OPENVPN3 = True
+except ImportError:
+    HAVE_OPENVPN3 = False
+
+
+@unittest.skipUnless(HAVE_OPENVPN3, 'requires the openvpn3 and dbus Python modules')
+class MatchNameTests(unittest.TestCase):
+    def test_exact_name(self):
+        self.assertTrue(MatchName('CloudConnexa', ['CloudConnexa']))
+        self.assertFalse(MatchName('CloudConnexa2', ['CloudConnexa']))
+
+    def test_glob(self):
+        self.assertTrue(MatchName('site-a-1', ['site-a-*']))
+        self.assertTrue(MatchName('site-a-1', ['site-?-1']))
+        self.assertTrue(MatchName('site-a-1', ['site-[ab]-1']))
+        self.assertFalse(MatchName('site-c-1', ['site-[ab]-1']))
+
+    def test_case_sensitive(self):
+        self.assertFalse(MatchName('cloudconnexa', ['CloudConnexa']))
+
+    def test_any_pattern(self):
+        self.assertTrue(MatchName('other', ['site-*', 'other']))
+        self.assertFalse(MatchName('other', []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#  OpenVPN Connector Setup
+#      - Configure OpenVPN 3 Linux for CloudConnexa™
+#
+#  SPDX-License-Identifier: AGPL-3.0-only
+#
+#  Copyright (C) 2020 - 2023  OpenVPN Inc. <sales@openvpn.net>
+#  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
+#
+
+import os
+import stat
+import tempfile
+import unittest
+from openvpn.connector.journal import ProvisionJournal, JournalError
+
+
+class ProvisionJournalTests(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.journal_dir = os.path.join(self._tmpdir.name, 'journal')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _reload(self):
+        return self._reload_name('Connector')
+
+    def _reload_name(self, name):
+        j = ProvisionJournal(self.journal_dir, name)
+        self.assertTrue(j.Load())
+        return j
+
+    def test_no_journal(self):
+        j = ProvisionJournal(self.journal_dir, 'Connector')
+        self.assertFalse(j.Load())
+        self.assertIsNone(j.GetLastStep())
+
+    def test_resume_after_last_step(self):
+        j = ProvisionJournal(self.journal_dir, 'Connector')
+        j.Commit('fetched', options={'--dco': False})
+        j.Commit('imported', config_path='/net/openvpn/v3/configuration/abc')
+
+        j = self._reload()
+        self.assertTrue(j.Completed('fetched'))
+        self.assertTrue(j.Completed('imported'))
+        self.assertFalse(j.Completed('configured'))
+        self.assertEqual('imported', j.GetLastStep())
+        self.assertEqual('/net/openvpn/v3/configuration/abc', j.Get('config_path'))
+
+    def test_changed_options(self):
+        j = ProvisionJournal(self.journal_dir, 'Connector')
+        j.Commit('fetched', options={'--dco': False, '--token': 'abc'})
+
+        j = self._reload()
+        self.assertEqual([], j.GetChangedOptions({'--dco': False, '--token': None}))
+        self.assertEqual(['--dco', '--token'],
+                         j.GetChangedOptions({'--dco': True, '--token': 'def'}))
+
+    def test_truncated_entry(self):
+        j = ProvisionJournal(self.journal_dir, 'Connector')
+        j.Commit('fetched')
+        with open(j.GetJournalFilename(), 'a') as fp:
+            fp.write('{"step": "impo')
+
+        j = self._reload()
+        self.assertEqual('fetched', j.GetLastStep())
+
+        # New entries must not be merged with the dropped partial line
+        j.Commit('imported')
+        j = self._reload()
+        self.assertEqual('imported', j.GetLastStep())
+
+    def test_corrupt_entry(self):
+        j = ProvisionJournal(self.journal_dir, 'Connector')
+        j.Commit('fetched')
+        with open(j.GetJournalFilename(), 'a') as fp:
+            fp.write('garbage\n')
+
+        with self.assertRaises(JournalError):
+            ProvisionJournal(self.journal_dir, 'Connector').Load()
+
+    def test_profile_compaction(self):
+        j = ProvisionJournal(self.journal_dir, 'Connector')
+        j.Commit('fetched', options={'--dco': True})
+        j.StoreProfile(b'client\n')
+        self.assertEqual(stat.S_IMODE(os.stat(j.GetJournalFilename()).st_mode), 0o600)
+
+        j = self._reload()
+        self.assertEqual(b'client\n', j.GetProfile())
+
+        j.Commit('imported', config_path='/net/openvpn/v3/configuration/abc')
+        j.Compact(drop=('profile',))
+        with open(j.GetJournalFilename(), 'rb') as fp:
+            self.assertNotIn(b'profile', fp.read())
+
+        j = self._reload()
+        self.assertIsNone(j.GetProfile())
+        self.assertTrue(j.Completed('fetched'))
+        self.assertEqual('imported', j.GetLastStep())
+        self.assertEqual({'--dco': True}, j.Get('options'))
+
+    def test_discard(self):
+        j = ProvisionJournal(self.journal_dir, 'Connector')
+        j.Commit('fetched')
+        j.Discard()
+        self.assertFalse(os.path.exists(j.GetJournalFilename()))
+        self.assertFalse(j.Completed('fetched'))
+
+    def test_escaped_name(self):
+        for name in ('../../x', 'a/b', '.hidden', '..'):
+            j = ProvisionJournal(self.journal_dir, name)
+            self.assertEqual(self.journal_dir, os.path.dirname(j.GetJournalFilename()))
+            self.assertFalse(os.path.basename(j.GetJournalFilename()).startswith('.'))
+            j.Commit('fetched')
+            self.assertEqual('fetched', self._reload_name(name).GetLastStep())
+
+        # Different names must not share a journal
+        self.assertNotEqual(ProvisionJournal(self.journal_dir, 'a/b').GetJournalFilename(),
+                            ProvisionJournal(self.journal_dir, 'a%2Fb').GetJournalFilename())
+
+    def test_unwritable_journal(self):
+        # A regular file where the journal directory should be
+        blocker = os.path.join(self._tmpdir.name, 'blocker')
+        open(blocker, 'w').close()
+
+        j = ProvisionJournal(os.path.join(blocker, 'journal'), 'Connector')
+        self.assertTrue(j.IsAvailable())
+        j.Commit('fetched')
+        self.assertFalse(j.IsAvailable())
+
+        # The setup continues with the steps tracked in memory only
+        j.Commit('imported')
+        self.assertTrue(j.Completed('imported'))
+        j.StoreProfile(b'client\n')
+        self.assertIsNone(j.GetProfile())
+        j.Compact()
+        j.Discard()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#  OpenVPN Connector Setup
+#      - Configure OpenVPN 3 Linux for CloudConnexa™
+#
+#  SPDX-License-Identifier: AGPL-3.0-only
+#
+#  Copyright (C) 2020 - 2023  OpenVPN Inc. <sales@openvpn.net>
+#  Copyright (C) 2020 - 2023  David Sommerseth <davids@openvpn.net>
+#
+
+import json
+import unittest
+
+try:
+    from openvpn.connector.status import SessionUnitName, SessionUnitConfigName
+    from openvpn.connector.status import FormatStatusTable, FormatStatusJSON
+    HAVE_OPENVPN3 = True
+except ImportError:
+    HAVE_OPENVPN3 = False
+
+
+def _connector(name, filestate, active, session=None):
+    return {'name': name,
+            'config_path': '/net/openvpn/v3/configuration/%s' % name,
+            'unit': 'openvpn3-session@%s.service' % name,
+            'unit_file_state': filestate,
+            'active_state': active,
+            'session_path': session and '/net/openvpn/v3/sessions/%s' % name or None,
+            'session_status': session}
+
+
+@unittest.skipUnless(HAVE_OPENVPN3, 'requires the openvpn3 and dbus Python modules')
+class SessionUnitNameTests(unittest.TestCase):
+    def test_unit_name(self):
+        self.assertEqual('openvpn3-session@CloudConnexa.service',
+                         SessionUnitName('CloudConnexa'))
+        self.assertEqual('openvpn3-session@*.service', SessionUnitName('*'))
+
+    def test_config_name(self):
+        self.assertEqual('CloudConnexa',
+                         SessionUnitConfigName('openvpn3-session@CloudConnexa.service'))
+        self.assertEqual('', SessionUnitConfigName(SessionUnitName('')))
+
+    def test_round_trip(self):
+        for name in ('site-a-1', 'with.dots', 'x'):
+            self.assertEqual(name, SessionUnitConfigName(SessionUnitName(name)))
+
+
+@unittest.skipUnless(HAVE_OPENVPN3, 'requires the openvpn3 and dbus Python modules')
+class FormatStatusTests(unittest.TestCase):
+    def setUp(self):
+        self.connectors = [_connector('CloudConnexa', 'enabled', 'active', 'CONN_CONNECTED'),
+                           _connector('site-b', 'disabled', 'inactive')]
+
+    def test_table(self):
+        lines = FormatStatusTable(self.connectors).split('\n')
+        self.assertEqual(4, len(lines))
+        self.assertEqual(['Name', 'Unit', 'file', 'Unit', 'state', 'Session', 'status'],
+                         lines[0].split())
+        self.assertEqual(['CloudConnexa', 'enabled', 'active', 'CONN_CONNECTED'],
+                         lines[2].split())
+        self.assertEqual(['site-b', 'disabled', 'inactive', '-'], lines[3].split())
+
+        # All columns are aligned with the header
+        self.assertEqual(lines[0].index('Unit file'), lines[2].index('enabled'))
+        self.assertEqual(lines[0].index('Session status'), lines[2].index('CONN_CONNECTED'))
+
+    def test_table_empty(self):
+        lines = FormatStatusTable([]).split('\n')
+        self.assertEqual(2, len(lines))
+        self.assertTrue(lines[0].startswith('Name'))
+
+    def test_json(self):
+        self.assertEqual(self.connectors, json.loads(FormatStatusJSON(self.connectors)))
+
+
+if __name__ == '__main__':
+    unittest.main()